@@ -33,6 +33,7 @@ import sys
 import threading
 from typing import Any, Callable
 import weakref
+import wx
 
 import addonHandler
 import api
@@ -47,7 +48,7 @@ import ui
 
 from .lib import synchronized
 from .lib.nestedChainMap import NestedChainMap
-from .coreUtils import translate
+from .coreUtils import isMainThread, translate
 
 
 if sys.version_info[1] < 9:
@@ -147,6 +148,8 @@ def terminate():
 	from .gui.settings import terminate as settings_terminate
 	settings_terminate()
 	
+	for cfg in list(TableConfig._cache.values()):
+		cfg.flushPendingSave()
 	TableConfig._cache.clear()
 	TableConfig._catalog = None
 
@@ -285,6 +288,9 @@ class TableConfig:
 	
 	FILE_PATH = os.path.join(globalVars.appArgs.configPath, "tableHandler.json")
 	
+	# Delay, in milliseconds, used to coalesce successive calls to `requestSave`
+	SAVE_DELAY = 500
+	
 	KeyType = Mapping|str
 	DataType = Mapping[str, Any]
 	if sys.version_info[1] >= 8:
@@ -297,6 +303,7 @@ class TableConfig:
 	_cache: Mapping[KeyType, "TableConfig"] = weakref.WeakValueDictionary()
 	_catalog: Sequence[KeyType] = None
 	_catalogLoadingThread: threading.Thread = None
+	_saveTimer: wx.CallLater = None
 	
 	@classmethod
 	@synchronized.function(lockHolderGetter=lambda func, *args, **kwargs: TableConfig)
@@ -393,7 +400,7 @@ class TableConfig:
 	
 	def __setitem__(self, name, value):
 		self.map[name] = value
-		self.save()
+		self.requestSave()
 	
 	def getColumnWidth(self, columnNumber):
 		size = braille.handler.displaySize
@@ -421,9 +428,37 @@ class TableConfig:
 		size = braille.handler.displaySize
 		width = min(width, size)
 		sizes = self["columnWidthsByDisplaySize"].setdefault(size, {})[columnNumber] = width
-		self.save()
+		self.requestSave()
 		return width
 	
+	def flushPendingSave(self):
+		"""Immediately perform the save scheduled by `requestSave`, if any.
+		"""
+		timer = self._saveTimer
+		if timer is None:
+			return
+		self._saveTimer = None
+		timer.Stop()
+		self.save()
+	
+	def requestSave(self):
+		"""Schedule a call to `save`, coalescing successive requests.
+		
+		Spares disk I/O on the main thread when the configuration is edited
+		repeatedly, such as when customizing column widths or toggling marks.
+		"""
+		if not isMainThread():
+			wx.CallAfter(self.requestSave)
+			return
+		timer = self._saveTimer
+		if timer is not None:
+			timer.Stop()
+		self._saveTimer = wx.CallLater(self.SAVE_DELAY, self._onSaveTimer)
+	
+	def _onSaveTimer(self):
+		self._saveTimer = None
+		self.save()
+	
 	@synchronized.function(lockHolderGetter=lambda func, *args, **kwargs: TableConfig)
 	def save(self):
 		configs = self.read() or []
@@ -35,7 +35,7 @@ import api
 from baseObject import ScriptableObject
 import braille
 import brailleInput
-from buildVersion import version_detailed as NVDA_VERSION
+from buildVersion import version_major, version_year
 import config
 import controlTypes
 from logHandler import log
@@ -65,6 +65,9 @@ from .tableUtils import (
 addonHandler.initTranslation()
 
 
+NVDA_VERSION = (version_year, version_major)
+
+
 SCRIPT_CATEGORY = "TableHandler"
 
 
@@ -563,7 +566,7 @@ class RowRegion(braille.TextInfoRegion):
 			# when resizing column widths.
 			self.brailleCells = brailleCells + [0] * unused
 		self.cursorPos = buffer.cursorWindowPos
-		if NVDA_VERSION >= "2023.3":
+		if NVDA_VERSION >= (2023, 3):
 			# Braille update is asynchronous as of NVDA PR #15163.
 			# As the system focus did not change, this set might still contain
 			# a region for a live TreeInterceptor.
@@ -1656,17 +1659,17 @@ class TableManager(ScriptableObject):
 			announce = marked[num]
 			if announce:
 				marked[num] = False
-				cfg.save()
+				cfg.requestSave()
 				# Translators: Reported when toggling marked columns
 				ui.message(_("Column marked without announce"))
 				return
 			del marked[num]
-			cfg.save()
+			cfg.requestSave()
 			# Translators: Reported when toggling marked columns
 			ui.message(_("Column unmarked"))
 			return
 		marked[num] = True
-		cfg.save()
+		cfg.requestSave()
 		# Translators: Reported when toggling marked columns
 		ui.message(_("Column marked with announce"))
 	
@@ -1698,17 +1701,17 @@ class TableManager(ScriptableObject):
 			announce = marked[num]
 			if announce:
 				marked[num] = False
-				cfg.save()
+				cfg.requestSave()
 				# Translators: Reported when toggling marked rows
 				ui.message(_("Row marked without announce"))
 				return
 			del marked[num]
-			cfg.save()
+			cfg.requestSave()
 			# Translators: Reported when toggling marked rows
 			ui.message(_("Row unmarked"))
 			return
 		marked[num] = True
-		cfg.save()
+		cfg.requestSave()
 		# Translators: Reported when toggling marked rows
 		ui.message(_("Row marked with announce"))
 	
@@ -26,13 +26,17 @@ __author__ = "Julien Cochuyt <j.cochuyt@accessolutions.fr>"
 __license__ = "GPL"
 
 
+from functools import lru_cache
 import sys
 
 import braille
-from buildVersion import version_detailed as NVDA_VERSION
+from buildVersion import version_major, version_year
 from logHandler import log
 
 
+NVDA_VERSION = (version_year, version_major)
+
+
 class TabularBrailleBuffer(braille.BrailleBuffer):
 	
 	def __init__(self):
@@ -92,7 +96,7 @@ class TabularBrailleBuffer(braille.BrailleBuffer):
 			if region.brailleCursorPos is not None:
 				self.cursorPos = start + region.brailleCursorPos
 			start += len(cells)
-		if NVDA_VERSION >= "2025.":
+		if NVDA_VERSION >= (2025, 1):
 			# NVDA 2025.1+ (as of PR nvaccess/nvda#17011 (commit cee553df47)
 			# derives the visible window (windowBrailleCells / windowRawText)
 			# from per-row buffer offsets to support multi-line braille displays.
@@ -129,6 +133,7 @@ def brailleCellsDecimalStringToIntegers(decs):
 	return res
 
 
+@lru_cache(maxsize=64)
 def brailleCellsDecimalStringToUnicode(decs):
 	return brailleCellsIntegersToUnicode(brailleCellsDecimalStringToIntegers(decs))
 
@@ -68,10 +68,10 @@ def getDynamicClass(bases):
 		bases = tuple(bases)
 	cache = DynamicNVDAObjectType._dynamicClassCache
 	dynCls = cache.get(bases)
-	if not dynCls:
-		name = "Dynamic_%s" % "".join([x.__name__ for x in bases])
-		dynCls = type(name, bases, {})
-		cache[bases] = dynCls
+	if dynCls is not None:
+		return dynCls
+	name = "Dynamic_%s" % "".join([x.__name__ for x in bases])
+	dynCls = cache[bases] = type(name, bases, {})
 	return dynCls
 
 
@@ -27,8 +27,7 @@ __license__ = "GPL"
 
 
 from abc import abstractmethod
-from collections import namedtuple
-from itertools import chain
+from collections import OrderedDict, namedtuple
 import os.path
 import weakref
 
@@ -65,7 +64,7 @@ from .fakeObjects.table import (
 	TextInfoDrivenFakeRow
 )
 from .scriptUtils import ScriptWrapper, overrides
-from .tableUtils import iterVirtualBufferTableCellsSafe
+from .tableUtils import clearSpanCache, collectVirtualBufferTableCellsSafe
 from .textInfoUtils import getField
 
 
@@ -257,8 +256,36 @@ class TableHandlerDocument(AutoPropertyObject):
 		return superCls
 
 
+def _getObjId(obj):
+	if isinstance(obj, FakeObject):
+		return id(obj)
+	return (obj.event_windowHandle, obj.event_objectID, obj.event_childID)
+
+
+def _cacheChildrenProperties(obj, cache):
+	for obj in obj.children:
+		speech.speakObjectProperties(
+			obj, states=True, reason=controlTypes.OutputReason.ONLYCACHE
+		)
+		#log.info(f"caching {_getObjId(obj)}: {obj._speakObjectPropertiesCache}")
+		cache[_getObjId(obj)] = obj._speakObjectPropertiesCache
+		_cacheChildrenProperties(obj, cache)
+
+
+def _speakChildrenPropertiesChange(obj, cache):
+	for obj in obj.children:
+		objId = _getObjId(obj)
+		obj._speakObjectPropertiesCache = cache.get(objId, {})
+		speech.speakObjectProperties(obj, states=True, reason=controlTypes.OutputReason.CHANGE)
+		cache[objId] = obj._speakObjectPropertiesCache
+		_speakChildrenPropertiesChange(obj, cache)
+
+
 class TableHandlerBmdtiScriptWrapper(ScriptWrapper):
 	
+	# `canPropagate` is set by `DocumentTableManager.getScript`
+	__slots__ = ("__self__", "canPropagate")
+	
 	def __init__(self, ti, script, **defaults):
 		defaults.setdefault("disableTableModeBefore", True)
 		defaults.setdefault("tryTableModeAfterIfBrowseMode", False)
@@ -287,22 +314,7 @@ class TableHandlerBmdtiScriptWrapper(ScriptWrapper):
 			table = cell.table
 			cache = ti._speakObjectTableCellChildrenPropertiesCache
 			cache.clear()
-			
-			def getObjId(obj):
-				if isinstance(obj, FakeObject):
-					return id(obj)
-				return (obj.event_windowHandle, obj.event_objectID, obj.event_childID)
-			
-			def cacheChildrenProperties(obj):
-				for obj in obj.children:
-					speech.speakObjectProperties(
-						obj, states=True, reason=controlTypes.OutputReason.ONLYCACHE
-					)
-					#log.info(f"caching {getObjId(obj)}: {obj._speakObjectPropertiesCache}")
-					cache[getObjId(obj)] = obj._speakObjectPropertiesCache
-					cacheChildrenProperties(obj)
-			
-			cacheChildrenProperties(cell)
+			_cacheChildrenProperties(cell, cache)
 			#log.info(f"cached as {ti.selection._startOffset} by {self.__name__}: {cell.rowNumber, cell.columnNumber} {cache!r}", stack_info=True)
 		else:
 			table = None
@@ -578,11 +590,10 @@ class TableHandlerBmdti(BrowseModeDocumentTreeInterceptor, DocumentTableHandler)
 		):
 			coords = kwargs.get("tableCellCoords")
 			if coords is None:
-				try:
-					coords = self._getTableCellCoordsIncludingLayoutTables(info)
-				except LookupError:
+				coords = self._tryGetTableCellCoordsIncludingLayoutTables(info)
+				if coords is None:
 					if kwargs.get("debug"):
-						log.exception()
+						log.info("THTI.setDefaultTableKwargs: Not in a table cell")
 					coords = False  # Avoid checking multiple times at same position
 				kwargs["tableCellCoords"] = coords
 			if coords:
@@ -646,6 +657,17 @@ class TableHandlerBmdti(BrowseModeDocumentTreeInterceptor, DocumentTableHandler)
 		@rtype: TableCellCoords (namedtuple)
 		@raises: LookupError if there is no table cell at this position.
 		"""
+		coords = self._tryGetTableCellCoordsIncludingLayoutTables(info)
+		if coords is None:
+			raise LookupError("Not in a table cell")
+		return coords
+	
+	def _tryGetTableCellCoordsIncludingLayoutTables(self, info):
+		"""Same as `_getTableCellCoordsIncludingLayoutTables`, but returns `None`
+		rather than raising if there is no table cell at this position.
+		
+		Being outside of a table is the most common outcome when probing the caret position.
+		"""
 		if info.isCollapsed:
 			info = info.copy()
 			info.expand(textInfos.UNIT_CHARACTER)
@@ -669,7 +691,7 @@ class TableHandlerBmdti(BrowseModeDocumentTreeInterceptor, DocumentTableHandler)
 			if tableID is not None:
 				break
 		else:
-			raise LookupError("Not in a table cell")
+			return None
 		return TableCellCoords(
 			tableID,
 			tableID in layoutIDs,
@@ -893,11 +915,56 @@ class TableHandlerBmdti(BrowseModeDocumentTreeInterceptor, DocumentTableHandler)
 
 class TableHandlerVirtualBuffer(TableHandlerBmdti):
 	
+	# Maximum number of table rows whose cells TextInfos are kept,
+	# see `_getTableRowCellsTextInfos`
+	tableRowCellsCacheSize = 8
+	
+	def __init__(self, rootNVDAObject):
+		super().__init__(rootNVDAObject)
+		self._tableFieldsCache = {}
+		self._tableRowCellsCache = OrderedDict()
+	
 	def getTableManager(self, nextHandler, **kwargs):
 		kwargs.setdefault("tableManagerClass", VirtualBufferTableManager)
 		return super().getTableManager(nextHandler, **kwargs)
 	
+	def _getTableRowCellsTextInfos(self, tableID, rowNumber, rowCount=None):
+		"""Retrieve the TextInfos of the cells of the given table row.
+		
+		A row is most often rendered several times in a row (braille, speech,
+		column navigation…), so the most recently requested rows are kept until
+		the next update of the buffer.
+		
+		On a cache miss, if the row count is specified, the adjacent rows are
+		prefetched once the current gesture has been handled, so that moving to
+		the previous or next row most often hits the cache.
+		"""
+		key = (tableID, rowNumber)
+		cache = self._tableRowCellsCache
+		infos = cache.get(key)
+		if infos is not None:
+			cache.move_to_end(key)
+			return infos
+		infos = cache[key] = tuple(
+			collectVirtualBufferTableCellsSafe(self, tableID, row=rowNumber)
+		)
+		if len(cache) > self.tableRowCellsCacheSize:
+			cache.popitem(last=False)
+		if rowCount:
+			for adjacentRowNumber in (rowNumber + 1, rowNumber - 1):
+				if 1 <= adjacentRowNumber <= rowCount:
+					queueCall(self._prefetchTableRowCellsTextInfos, tableID, adjacentRowNumber)
+		return infos
+	
+	def _prefetchTableRowCellsTextInfos(self, tableID, rowNumber):
+		if not self.isAlive or (tableID, rowNumber) in self._tableRowCellsCache:
+			return
+		self._getTableRowCellsTextInfos(tableID, rowNumber)
+	
 	def _handleUpdate(self):
+		clearSpanCache()
+		self._tableFieldsCache.clear()
+		self._tableRowCellsCache.clear()
 		super()._handleUpdate()
 		if self.passThrough != TABLE_MODE:
 			return
@@ -929,22 +996,8 @@ class TableHandlerVirtualBuffer(TableHandlerBmdti):
 					return
 			cell.__dict__.setdefault("_trackingInfo", []).append("TI._handleUpdate")
 			cache = self._speakObjectTableCellChildrenPropertiesCache
-			
-			def getObjId(obj):
-				if isinstance(obj, FakeObject):
-					return id(obj)
-				return (obj.event_windowHandle, obj.event_objectID, obj.event_childID)
-			
-			def speakChildrenPropertiesChange(obj):
-				for obj in obj.children:
-					objId = getObjId(obj)
-					obj._speakObjectPropertiesCache = cache.get(objId, {})
-					speech.speakObjectProperties(obj, states=True, reason=controlTypes.OutputReason.CHANGE)
-					cache[objId] = obj._speakObjectPropertiesCache
-					speakChildrenPropertiesChange(obj)
-			
 			if cache:
-				speakChildrenPropertiesChange(cell)
+				_speakChildrenPropertiesChange(cell, cache)
 
 			focus = api.getFocusObject()
 			if isinstance(focus, DocumentFakeCell) or focus.treeInterceptor is self:
@@ -965,6 +1018,9 @@ class TableHandlerVirtualBuffer(TableHandlerBmdti):
 	
 	def _loadBufferDone(self, success=True):
 		#log.warning(f"_loadBufferDone({success})")
+		clearSpanCache()
+		self._tableFieldsCache.clear()
+		self._tableRowCellsCache.clear()
 		super()._loadBufferDone(success=success)
 		
 
@@ -1071,17 +1127,25 @@ class DocumentRootFakeObject(DocumentFakeObject):
 	_cache_parent = False
 	
 	def _get_parent(self):
+		ti = self.ti
+		parent = self._parent() if self._parent else None
+		if parent is not None and ti is not None and parent.treeInterceptor is ti:
+			# Still alive and within the same document
+			return parent
 		parent = None
 		focus = api.getFocusObject()
+		ancestors = api.getFocusAncestors()
 		if self is focus:
-			parent = next(reversed(api.getFocusAncestors()))
+			parent = ancestors[-1]
 		else:
-			for obj in chain((focus,), reversed(api.getFocusAncestors())):
-				if isinstance(obj, FakeObject):
-					continue
-				if obj.treeInterceptor is self.ti:
-					parent = obj
-				break
+			# Only consider the nearest non-fake object, starting from the focus
+			obj = focus
+			index = len(ancestors)
+			while index and isinstance(obj, FakeObject):
+				index -= 1
+				obj = ancestors[index]
+			if not isinstance(obj, FakeObject) and obj.treeInterceptor is ti:
+				parent = obj
 		if parent is None:
 			# Should be a warning, but let's make it "ding" for now…
 			log.error("Could not determine a suitable parent within the focus ancestry.")
@@ -1105,16 +1169,25 @@ class DocumentTableManager(FakeTableManager, DocumentFakeObject):
 	
 	RowClass = DocumentFakeRow
 	
+	# Parsing the table control field is costly and queried for each rendered row or cell.
+	# Rely on the auto-property cache, invalidated on each core cycle, so that document
+	# updates are still taken into account.
+	_cache_field = True
+	
 	def _get_field(self):
 		info = self.startPos if self.startPos else self._currentCell.info
 		return getField(info, "controlStart", role=controlTypes.ROLE_TABLE)
 	
+	_cache_columnCount = True
+	
 	def _get_columnCount(self):
 		count = self.field.get("table-columncount")
 		if isinstance(count, str):
 			count = int(count)
 		return count
 	
+	_cache_rowCount = True
+	
 	def _get_rowCount(self):
 		count = self.field.get("table-rowcount")
 		if isinstance(count, str):
@@ -1229,8 +1302,10 @@ class DocumentTableManager(FakeTableManager, DocumentFakeObject):
 				caseSensitive=self.filterCaseSensitive or False
 			):
 				break
-			func = self.ti._getTableCellCoordsIncludingLayoutTables
-			tableID, isLayout, rowNum, colNum, rowSpan, colSpan = func(info)
+			coords = self.ti._tryGetTableCellCoordsIncludingLayoutTables(info)
+			if coords is None:
+				break
+			tableID, isLayout, rowNum, colNum, rowSpan, colSpan = coords
 			if tableID is not None and tableID == self.tableID:
 				if rowNum == fromCell.rowNumber:
 					continue
@@ -1303,5 +1378,24 @@ class DocumentTableManager(FakeTableManager, DocumentFakeObject):
 
 class VirtualBufferTableManager(DocumentTableManager):
 	
+	def _get_field(self):
+		ti = self.ti
+		if not isinstance(ti, TableHandlerVirtualBuffer):
+			return super()._get_field()
+		# Table managers are short-lived: Share the parsed field until the next buffer update
+		cache = ti._tableFieldsCache
+		field = cache.get(self.tableID)
+		if field is None:
+			field = super()._get_field()
+			if field is not None:
+				cache[self.tableID] = field
+		return field
+	
 	def _iterCellsTextInfos(self, rowNumber):
-		return iterVirtualBufferTableCellsSafe(self.ti, self.tableID, row=rowNumber)
+		ti = self.ti
+		if not isinstance(ti, TableHandlerVirtualBuffer):
+			# Rows are most often fully consumed, see `TextInfoDrivenFakeRow._getCell`
+			return iter(collectVirtualBufferTableCellsSafe(ti, self.tableID, row=rowNumber))
+		infos = ti._getTableRowCellsTextInfos(self.tableID, rowNumber, rowCount=self.rowCount)
+		# The cached TextInfos are shared, hand out copies
+		return (info.copy() for info in infos)
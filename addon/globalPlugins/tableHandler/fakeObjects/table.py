@@ -32,7 +32,7 @@ from NVDAObjects import NVDAObject
 import addonHandler
 import api
 import braille
-from buildVersion import version_detailed as NVDA_VERSION
+from buildVersion import version_major, version_year
 import config
 import controlTypes
 from logHandler import log
@@ -48,6 +48,9 @@ from . import CHILD_ACCESS_GETTER, CHILD_ACCESS_ITERATION, CHILD_ACCESS_SEQUENCE
 addonHandler.initTranslation()
 
 
+NVDA_VERSION = (version_year, version_major)
+
+
 class ColumnSeparator(FakeObject):
 	"""Represents a column separator, as presented on a table row's braille region.
 	"""
@@ -224,7 +227,7 @@ class ResizingCell(FakeObject):
 		braille.handler.handleUpdate(self)
 		
 		def setColumnWidthBraille_trailer(token=None):
-			if NVDA_VERSION >= "2023.3":
+			if NVDA_VERSION >= (2023, 3):
 				# Braille update is asynchronous as of NVDA PR #15163.
 				if braille.handler._regionsPendingUpdate:
 					# Avoid emitting unrelevant trailer announces on fast key repeat
@@ -569,7 +572,8 @@ class FakeTableManager(TableManager, FakeObject):
 	
 	def _getRow(self, rowNumber):
 		row = self._rows.get(rowNumber)
-		if row and not(rowNumber <= row.rowNumber < rowNumber + getRowSpanSafe(row)):
+		# The cached span would defeat this check
+		if row and not(rowNumber <= row.rowNumber < rowNumber + getRowSpanSafe(row, refresh=True)):
 			# This discrepency is most likely due to an update of the document.
 			row = None
 		if not row and self._canCreateRow(rowNumber):
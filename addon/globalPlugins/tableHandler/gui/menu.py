@@ -25,6 +25,8 @@ __author__ = "Julien Cochuyt <j.cochuyt@accessolutions.fr>"
 __license__ = "GPL"
 
  
+from functools import partial
+
 import wx
 
 import addonHandler
@@ -33,7 +35,7 @@ import controlTypes
 import gui
 import ui
 
-from ..behaviors import Cell, TableManager
+from ..behaviors import AXIS_COLUMNS, AXIS_ROWS, Cell, TableManager
 from ..scriptUtils import getScriptGestureMenuHint
 from ..tableUtils import getColumnHeaderTextSafe, getRowHeaderTextSafe
 
@@ -43,6 +45,22 @@ def show():
 	gui.mainFrame.postPopup()
 
 
+_settingsClasses = None
+
+
+def _getSettingsClasses():
+	"""Resolve, only once, the settings dialog and panel classes.
+	
+	The import is deferred to first use to keep the add-on loading light.
+	"""
+	global _settingsClasses
+	if _settingsClasses is None:
+		from gui.settingsDialogs import NVDASettingsDialog
+		from .settings import TableHandlerSettingsPanel
+		_settingsClasses = (NVDASettingsDialog, TableHandlerSettingsPanel)
+	return _settingsClasses
+
+
 
 class Menu(wx.Menu):
 	
@@ -55,11 +73,17 @@ class Menu(wx.Menu):
 			cfg = cell.table._tableConfig
 			rowNum = cell.rowNumber
 			colNum = cell.columnNumber
+			role = cell.role
+			colHeaRowNum = cfg["columnHeaderRowNumber"]
+			rowHeaColNum = cfg["rowHeaderColumnNumber"]
+			customCols = cfg["customColumnHeaders"]
+			customRows = cfg["customRowHeaders"]
+			markedCols = cfg["markedColumnNumbers"]
+			markedRows = cfg["markedRowNumbers"]
 			
 			sub = wx.Menu()
 			
-			colHeaRowNum = cfg["columnHeaderRowNumber"]
-			if cell.role == controlTypes.ROLE_TABLECOLUMNHEADER:
+			if role == controlTypes.ROLE_TABLECOLUMNHEADER:
 				# Translators: An entry in the context menu Table Mode > Column Headers
 				label = _("Use the default column headers of this table")
 			else:
@@ -71,19 +95,20 @@ class Menu(wx.Menu):
 			item = sub.AppendCheckItem(wx.ID_ANY, label)
 			self.Bind(wx.EVT_MENU, self.onSetColHeaderRowNumber, item)
 			if colHeaRowNum == rowNum or (
-				colHeaRowNum == None and cell.role == controlTypes.ROLE_TABLECOLUMNHEADER
+				colHeaRowNum == None and role == controlTypes.ROLE_TABLECOLUMNHEADER
 			):
 				item.Check()
 			
-			if colNum in cfg["customColumnHeaders"]:
+			customCol = customCols.get(colNum)
+			if customCol is not None:
 				# Translators: An entry in the context menu Table Mode > Column Headers
-				label = _("&Customized: {}").format(cfg["customColumnHeaders"][colNum])
+				label = _("&Customized: {}").format(customCol)
 			else:
 				# Translators: An entry in the context menu Table Mode > Column Headers
 				label = _("&Customize the header of this column")
 			item = sub.AppendCheckItem(wx.ID_ANY, label)
 			self.Bind(wx.EVT_MENU, self.onCustomizeColHeader, item)
-			if colNum in cfg["customColumnHeaders"]:
+			if customCol is not None:
 				item.Check()
 			
 			# Translators: An entry in the Table Mode context menu
@@ -92,8 +117,7 @@ class Menu(wx.Menu):
 			
 			sub = wx.Menu()
 			
-			rowHeaColNum = cfg["rowHeaderColumnNumber"]
-			if cell.role == controlTypes.ROLE_TABLEROWHEADER:
+			if role == controlTypes.ROLE_TABLEROWHEADER:
 				# Translators: An entry in the context menu Table Mode > Row Headers
 				label = _("Use the default row headers of this table")
 			else:
@@ -105,19 +129,20 @@ class Menu(wx.Menu):
 			item = sub.AppendCheckItem(wx.ID_ANY, label)
 			self.Bind(wx.EVT_MENU, self.onSetRowHeaderColNumber, item)
 			if rowHeaColNum == colNum or (
-				rowHeaColNum == None and cell.role == controlTypes.ROLE_TABLEROWHEADER
+				rowHeaColNum == None and role == controlTypes.ROLE_TABLEROWHEADER
 			):
 				item.Check()
 			
-			if rowNum in cfg["customRowHeaders"]:
+			customRow = customRows.get(rowNum)
+			if customRow is not None:
 				# Translators: An entry in the context menu Table Mode > Row Headers
-				label = _("&Customized: {}").format(cfg["customRowHeaders"][rowNum])
+				label = _("&Customized: {}").format(customRow)
 			else:
 				# Translators: An entry in the context menu Table Mode > Row Headers
 				label = _("&Customize the header of this row")
 			item = sub.AppendCheckItem(wx.ID_ANY, label)
 			self.Bind(wx.EVT_MENU, self.onCustomizeRowHeader, item)
-			if rowNum in cfg["customRowHeaders"]:
+			if customRow is not None:
 				item.Check()
 			
 			# Translators: An entry in the Table Mode context menu
@@ -130,17 +155,17 @@ class Menu(wx.Menu):
 				
 				# Translators: An entry in the context menu Table Mode > Marked Columns
 				items[True] = item = sub.AppendRadioItem(wx.ID_ANY, _("Marked with &announce"))
-				self.Bind(wx.EVT_MENU, self.onToggleMarkedCol_WithAnnounce, item)
+				self.Bind(wx.EVT_MENU, partial(self.onToggleMarked, AXIS_COLUMNS, True), item)
 				
 				# Translators: An entry in the context menu Table Mode > Marked Columns
 				items[False] = item = sub.AppendRadioItem(wx.ID_ANY, _("Marked with&out announce"))
-				self.Bind(wx.EVT_MENU, self.onToggleMarkedCol_WithoutAnnounce, item)
+				self.Bind(wx.EVT_MENU, partial(self.onToggleMarked, AXIS_COLUMNS, False), item)
 				
 				# Translators: An entry in the context menu Table Mode > Marked Columns
 				items[None] = item = sub.AppendRadioItem(wx.ID_ANY, _("&Not marked"))
-				self.Bind(wx.EVT_MENU, self.onToggleMarkedCol_Unmarked, item)
+				self.Bind(wx.EVT_MENU, partial(self.onToggleMarked, AXIS_COLUMNS, None), item)
 				
-				items[cfg["markedColumnNumbers"].get(colNum)].Check()
+				items[markedCols.get(colNum)].Check()
 			
 			# Translators: An entry in the Table Mode context menu
 			label = _("Marked Columns")
@@ -159,17 +184,17 @@ class Menu(wx.Menu):
 				
 				# Translators: An entry in the context menu Table Mode > Marked Rows
 				items[True] = item = sub.AppendRadioItem(wx.ID_ANY, _("Marked with &announce"))
-				self.Bind(wx.EVT_MENU, self.onToggleMarkedRow_WithAnnounce, item)
+				self.Bind(wx.EVT_MENU, partial(self.onToggleMarked, AXIS_ROWS, True), item)
 				
 				# Translators: An entry in the context menu Table Mode > Marked Rows
 				items[False] = item = sub.AppendRadioItem(wx.ID_ANY, _("Marked with&out announce"))
-				self.Bind(wx.EVT_MENU, self.onToggleMarkedRow_WithoutAnnounce, item)
+				self.Bind(wx.EVT_MENU, partial(self.onToggleMarked, AXIS_ROWS, False), item)
 				
 				# Translators: An entry in the context menu Table Mode > Marked Rows
 				items[None] = item = sub.AppendRadioItem(wx.ID_ANY, _("&Not marked"))
-				self.Bind(wx.EVT_MENU, self.onToggleMarkedRow_Unmarked, item)
+				self.Bind(wx.EVT_MENU, partial(self.onToggleMarked, AXIS_ROWS, None), item)
 				
-				items[cfg["markedRowNumbers"].get(rowNum)].Check()
+				items[markedRows.get(rowNum)].Check()
 			
 			# Translators: An entry in the Table Mode context menu
 			label = _("Marked Rows")
@@ -254,7 +279,7 @@ class Menu(wx.Menu):
 		num = cell.columnNumber
 		if num in customHeaders:
 			del customHeaders[num]
-			cfg.save()
+			cfg.requestSave()
 			return
 		dlg = wx.TextEntryDialog(
 			gui.mainFrame,
@@ -263,7 +288,7 @@ class Menu(wx.Menu):
 		)
 		if dlg.ShowModal() == wx.ID_OK:
 			customHeaders[num] = dlg.Value
-			cfg.save()
+			cfg.requestSave()
 	
 	def onCustomizeRowHeader(self, evt):
 		cell = gui.mainFrame.prevFocus
@@ -272,7 +297,7 @@ class Menu(wx.Menu):
 		num = cell.rowNumber
 		if num in customHeaders:
 			del customHeaders[num]
-			cfg.save()
+			cfg.requestSave()
 			return
 		dlg = wx.TextEntryDialog(
 			gui.mainFrame,
@@ -281,45 +306,24 @@ class Menu(wx.Menu):
 		)
 		if dlg.ShowModal() == wx.ID_OK:
 			customHeaders[num] = dlg.Value
-			cfg.save()
+			cfg.requestSave()
 	
-	def onToggleMarkedCol_WithAnnounce(self, evt):
+	def onToggleMarked(self, axis, state, evt):
 		cell = gui.mainFrame.prevFocus
 		cfg = cell.table._tableConfig
-		cfg["markedColumnNumbers"][cell.columnNumber] = True
-		cfg.save()
-	
-	def onToggleMarkedCol_WithoutAnnounce(self, evt):
-		cell = gui.mainFrame.prevFocus
-		cfg = cell.table._tableConfig
-		cfg["markedColumnNumbers"][cell.columnNumber] = False
-		cfg.save()
-	
-	def onToggleMarkedCol_Unmarked(self, evt):
-		cell = gui.mainFrame.prevFocus
-		cfg = cell.table._tableConfig
-		cfg["markedColumnNumbers"].pop(cell.columnNumber, None)
-		cfg.save()
-	
-	def onToggleMarkedRow_WithAnnounce(self, evt):
-		cell = gui.mainFrame.prevFocus
-		cfg = cell.table._tableConfig
-		cfg["markedRowNumbers"][cell.rowNumber] = True
-		cfg.save()
-	
-	def onToggleMarkedRow_WithoutAnnounce(self, evt):
-		cell = gui.mainFrame.prevFocus
-		cfg = cell.table._tableConfig
-		cfg["markedRowNumbers"][cell.rowNumber] = False
-		cfg.save()
-	
-	def onToggleMarkedRow_Unmarked(self, evt):
-		cell = gui.mainFrame.prevFocus
-		cfg = cell.table._tableConfig
-		cfg["markedRowNumbers"].pop(cell.rowNumber, None)
-		cfg.save()
+		if axis == AXIS_COLUMNS:
+			marked = cfg["markedColumnNumbers"]
+			num = cell.columnNumber
+		elif axis == AXIS_ROWS:
+			marked = cfg["markedRowNumbers"]
+			num = cell.rowNumber
+		else:
+			raise ValueError("axis={!r}".format(axis))
+		if state is None:
+			marked.pop(num, None)
+		else:
+			marked[num] = state
+		cfg.requestSave()
 	
 	def onPreferences(self, evt):
-		from gui.settingsDialogs import NVDASettingsDialog 
-		from .settings import TableHandlerSettingsPanel
-		gui.mainFrame._popupSettingsDialog(NVDASettingsDialog, TableHandlerSettingsPanel)
+		gui.mainFrame._popupSettingsDialog(*_getSettingsClasses())
@@ -36,25 +36,33 @@ class NestedChainMap(ChainMap):
 	"""A ChainMap that also chains its Mapping values
 	"""
 	
+	# `ChainMap` does not declare `__slots__`, so instances still have a `__dict__`
+	# (holding `maps`), but slot descriptors speed up access to the attributes
+	# read on every lookup.
+	__slots__ = ("containerLink", "virtual")
+	
 	def __init__(self, *maps):
 		super().__init__(*maps)
 		self.containerLink = (None, None)
 		self.virtual = False
 	
 	def __delitem__(self, key):
-		self._fetchUpdateFromContainer()
-		super().__delitem__(key)
-	
-	def __delitem__(self, key):
-		self._fetchUpdateFromContainer()
+		if self.virtual:
+			self._fetchUpdateFromContainer()
 		super().__delitem__(key)
 	
 	def __getitem__(self, key):
-		self._fetchUpdateFromContainer()
-		return self._nested(key, super().__getitem__(key))
+		if self.virtual:
+			self._fetchUpdateFromContainer()
+		value = ChainMap.__getitem__(self, key)
+		# Inlined fast path for the most common case of non-Mapping values
+		if not isinstance(value, Mapping) or len(self.maps) < 2:
+			return value
+		return self._nested(key, value)
 	
 	def __setitem__(self, key, value):
-		self._fetchUpdateFromContainer()
+		if self.virtual:
+			self._fetchUpdateFromContainer()
 		if isinstance(value, self.__class__):
 			cnt, cntKey = value.containerLink
 			if cnt is self and cntKey == key:
@@ -63,7 +71,8 @@ class NestedChainMap(ChainMap):
 		self._pushUpdateToContainer()
 	
 	def clear(self):
-		self._fetchUpdateFromContainer()
+		if self.virtual:
+			self._fetchUpdateFromContainer()
 		shouldPush = bool(self.maps[0])
 		super().clear()
 		if shouldPush:
@@ -78,16 +87,20 @@ class NestedChainMap(ChainMap):
 		}
 	
 	def items(self):
-		self._fetchUpdateFromContainer()
-		for key, value in super().items():
-			yield key, self._nested(key, value)
+		if self.virtual:
+			self._fetchUpdateFromContainer()
+		# `ChainMap.__iter__` collects the unique keys across all maps beforehand
+		for key in ChainMap.__iter__(self):
+			yield key, self[key]
 	
 	def pop(self, *args):
-		self._fetchUpdateFromContainer()
+		if self.virtual:
+			self._fetchUpdateFromContainer()
 		super().pop(*args)
 	
 	def popitem(self):
-		self._fetchUpdateFromContainer()
+		if self.virtual:
+			self._fetchUpdateFromContainer()
 		key, value = super().popitem()
 		return key, self._nested(key, value)
 	
@@ -97,6 +110,9 @@ class NestedChainMap(ChainMap):
 	
 	def _fetchUpdateFromContainer(self):
 		"""Resynchronize this instance to its emitting container, if any.
+		
+		Callers check `self.virtual` beforehand, sparing the method call for
+		the root instance and for already resynchronized ones.
 		"""
 		if not self.virtual:
 			return
@@ -271,6 +287,19 @@ Actual result: {pformat(res)}
 Test:           combined parents
 Expected:       {pformat(expected)}
 Actual result: {pformat(res)}
+"""
+	
+	shared = {"x": 1}
+	ncm = NestedChainMap(shared, {"y": {}})
+	list(ncm.items())
+	del shared["x"]
+	shared["w"] = 2
+	expected = {"w": 2, "y": {}}
+	res = ncm.dump()
+	assert res == expected, f"""
+Test:           chained map changed out-of-band
+Expected:       {pformat(expected)}
+Actual result: {pformat(res)}
 """
 	
 	print("OK")
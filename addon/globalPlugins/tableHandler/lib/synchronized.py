@@ -24,27 +24,55 @@ This module provides functions and methods decorators to allow
 their synchronized execution (non-reentrant by concurrent threads).
 """
 
-# Keep compatible with Python 2
-from __future__ import absolute_import, division, print_function
-
 __version__ = "2021.05.27"
 __author__ = "Julien Cochuyt <j.cochuyt@accessolutions.fr>"
 __license__ = "GPL"
 
 import threading
 
+try:
+	# Optional faster drop-in replacement, if available
+	from fastrlock.rlock import FastRLock as _RLock
+except ImportError:
+	_RLock = threading.RLock
+
+
+# Guards the installation of locks on holders lacking a plain `__dict__`
+_installLock = threading.Lock()
 
-def synchronized(lockHolderGetter, lockAttrName, lockCreator=lambda: threading.RLock()):
+
+def synchronized(lockHolderGetter, lockAttrName, lockCreator=None, reentrant=True):
+	"""
+	Base decorator factory.
+	
+	Unless a :lockCreator: is specified, a reentrant lock is used.
+	Pass `reentrant=False` to use a cheaper :threading.Lock: for leaf functions
+	that neither recurse nor call another function synchronized on the same lock.
+	"""
+	if lockCreator is None:
+		lockCreator = _RLock if reentrant else threading.Lock
 	
 	def decorator(func):
 		
-		def wrapper(*args, **kwargs):
+		# Builtins are bound as keyword-only defaults to be looked up as fast locals
+		def wrapper(*args, _getattr=getattr, _type=type, _dict=dict, **kwargs):
 			holder = lockHolderGetter(func, *args, **kwargs)
-			if not hasattr(holder, lockAttrName):
-				lock = lockCreator()
-				setattr(holder, lockAttrName, lock)
-			# Get back from holder in case of concurrent creation
-			lock = getattr(holder, lockAttrName)
+			holderDict = _getattr(holder, "__dict__", None)
+			if _type(holderDict) is _dict:
+				# Functions and most instances: a single atomic dict lookup
+				lock = holderDict.get(lockAttrName)
+				if lock is None:
+					lock = holderDict.setdefault(lockAttrName, lockCreator())
+			else:
+				# Classes (read-only mappingproxy) or slotted instances
+				lock = _getattr(holder, lockAttrName, None)
+				if lock is None:
+					with _installLock:
+						# Check again in case of concurrent creation
+						lock = _getattr(holder, lockAttrName, None)
+						if lock is None:
+							lock = lockCreator()
+							setattr(holder, lockAttrName, lock)
 			with lock:
 				return func(*args, **kwargs)
 		
@@ -56,23 +84,29 @@ def synchronized(lockHolderGetter, lockAttrName, lockCreator=lambda: threading.R
 def function(
 	lockHolderGetter=lambda func, *args, **kwargs: func,
 	lockAttrName="__lock__",
-	lockCreator=lambda: threading.RLock(),
+	lockCreator=None,
+	reentrant=True,
 ):
 	"""
 	Decorator for synchronized execution (non-reentrant by concurrent threads)
 	of a function.
 	
 	The :threading.RLock: is held as an attribute of the decorated function itself.
+	See :synchronized:
 	"""
 	return synchronized(
-		lockHolderGetter=lockHolderGetter, lockAttrName=lockAttrName, lockCreator=lockCreator
+		lockHolderGetter=lockHolderGetter,
+		lockAttrName=lockAttrName,
+		lockCreator=lockCreator,
+		reentrant=reentrant,
 	)
 
 
 def bound(func,
 	lockHolderGetter=lambda func, *args, **kwargs: args[0],
 	lockAttrName="__lock__",
-	lockCreator=lambda: threading.RLock(),
+	lockCreator=None,
+	reentrant=True,
 ):
 	"""
 	Decorator for synchronized execution (non-reentrant by concurrent threads)
@@ -82,13 +116,15 @@ def bound(func,
 	to which the decorated function is bound and scoped to this object.
 	See :synchronized:
 	"""
-	return function(lockHolderGetter=lambda func, *args, **kwargs: args[0])(func)
 	return synchronized(
-		lockHolderGetter=lockHolderGetter, lockAttrName=lockAttrName, lockCreator=lockCreator
-	)
+		lockHolderGetter=lockHolderGetter,
+		lockAttrName=lockAttrName,
+		lockCreator=lockCreator,
+		reentrant=reentrant,
+	)(func)
 
 
-def method(func):
+def method(func, reentrant=True):
 	"""
 	Decorator for synchronized execution (non-reentrant by concurrent threads)
 	of an instance or class method.
@@ -100,6 +136,7 @@ def method(func):
 	return synchronized(
 		lockHolderGetter=lambda func, *args, **kwargs: args[0],
 		lockAttrName=f"{func.__name__}__lock__",
+		reentrant=reentrant,
 	)(func)
 
 
@@ -109,19 +146,20 @@ if __name__ == '__main__':
 	import time
 	import sys
 	# Alias to current module to allow client-code-like naming
-	synchronized = sys.modules[__name__]
+	# (without shadowing the `synchronized` function used by the decorators)
+	sync = sys.modules[__name__]
 	
 	class C:
 		def __init__(self):
 			self.counter = 0
 		
-		@synchronized.method
+		@sync.bound
 		def inc(self):
 			new_value = self.counter + 1
 			time.sleep(0.01)
 			self.counter = new_value
 		
-		@synchronized.method
+		@sync.bound
 		def dec(self):
 			new_value = self.counter - 1
 			time.sleep(0.05)
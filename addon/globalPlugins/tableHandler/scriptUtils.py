@@ -26,13 +26,12 @@ __author__ = "Julien Cochuyt <j.cochuyt@accessolutions.fr>"
 __license__ = "GPL"
 
 
-from itertools import groupby
-
 import addonHandler
 import inputCore
 from keyboardHandler import KeyboardInputGesture
 from logHandler import log
 import gui
+import wx
 
 from .coreUtils import translate 
 
@@ -40,11 +39,17 @@ from .coreUtils import translate
 addonHandler.initTranslation()
 
 
+# Marks missing attributes, notably in `ScriptWrapper._resolved`
+_MISSING = object()
+
+
 class ScriptWrapper:
 	"""
 	Wrap a script to help controlling its metadata or its execution.
 	"""
 	
+	__slots__ = ("_resolved", "_overrideKwargs", "script", "_override", "arg", "defaults")
+	
 	def __init__(
 		self,
 		script,
@@ -52,59 +57,119 @@ class ScriptWrapper:
 		arg="script",
 		**defaults
 	):
+		# Attributes resolved by `__getattr__`, including misses
+		self._resolved = {}
 		self.script = script
-		self.override = override
+		# Not named `override`, as subclasses commonly define such a method
+		self._override = override
 		self.arg = arg
 		self.defaults = defaults
+		# Computed once rather than on each call
+		self._overrideKwargs = {arg: script} if override else None
 	
 	def __call__(self, *args, **kwargs):
-		script = self.script
-		override = self.override
-		if override:
-			# Throws `TypeError` on purpose if `arg` is already in `kwargs`
-			return override(*args, **kwargs, **{self.arg: script})
-		return script(*args, **kwargs)
+		overrideKwargs = self._overrideKwargs
+		if overrideKwargs is None:
+			return self.script(*args, **kwargs)
+		# Throws `TypeError` on purpose if `arg` is already in `kwargs`
+		return self._override(*args, **kwargs, **overrideKwargs)
 	
 	def __getattr__(self, name):
 		# Pass existing wrapped script attributes such as __doc__, __name__,
 		# category, ignoreTreeInterceptorPassThrough or resumeSayAllMode.
 		# Note: scriptHandler.executeScript looks at script.__func__ to
 		# prevent recursion.
+		if name == "_resolved":
+			# Not initialized yet
+			raise AttributeError(name)
+		resolved = self._resolved
+		if name not in resolved:
+			resolved[name] = self._resolve(name)
+		value = resolved[name]
+		if value is _MISSING:
+			raise AttributeError(name)
+		return value
+	
+	def _resolve(self, name):
 		if name != "__name__":
-			override = self.override
-			if override and __name__ != "__doc__":
-				try:
-					return getattr(override, name)
-				except AttributeError:
-					pass
-		try:
-			return getattr(self.script, name)
-		except AttributeError:
-			pass
-		try:
-			return self.defaults[name]
-		except KeyError:
-			pass
-		raise AttributeError(name)
+			override = self._override
+			if override:
+				value = getattr(override, name, _MISSING)
+				if value is not _MISSING:
+					return value
+		value = getattr(self.script, name, _MISSING)
+		if value is not _MISSING:
+			return value
+		return self.defaults.get(name, _MISSING)
 	
 	def __repr__(self):
-		override = self.override
+		override = self._override
 		if override and getattr(override, "__self__", None) is not self:
 			return "<{} script={!r}, override={!r}>".format("SW" or type(self), self.script, override)
 		return "<{} script={!r}>".format("SW" or type(self), self.script)
 
 
+_gestureMappingsCache = None
+
+
+def _clearGestureMappingsCache():
+	global _gestureMappingsCache
+	_gestureMappingsCache = None
+
+
+def _getAllGestureMappings(obj, ancestors):
+	"""Cached variant of `inputCore.manager.getAllGestureMappings`.
+	
+	The result is only kept until the current main loop iteration completes,
+	so that populating a menu or a set of hints walks all the gesture maps
+	only once, without ever missing a subsequent change of the bindings.
+	"""
+	global _gestureMappingsCache
+	ancestors = tuple(ancestors or ())
+	cache = _gestureMappingsCache
+	if (
+		cache is not None
+		and cache[0] is obj
+		and len(cache[1]) == len(ancestors)
+		and all(cached is ancestor for cached, ancestor in zip(cache[1], ancestors))
+	):
+		return cache[2]
+	map = inputCore.manager.getAllGestureMappings(obj=obj, ancestors=ancestors)
+	if cache is None:
+		wx.CallAfter(_clearGestureMappingsCache)
+	_gestureMappingsCache = (obj, ancestors, map)
+	return map
+
+
 def getScriptInfo(scriptCls, script, obj=None, ancestors=None):
 	if obj is None:
 		obj = gui.mainFrame.prevFocus
 	if ancestors is None:
 		ancestors = gui.mainFrame.prevFocusAncestors
-	map = inputCore.manager.getAllGestureMappings(obj=obj, ancestors=ancestors)
+	map = _getAllGestureMappings(obj, ancestors)
 	category = inputCore._AllGestureMappingsRetriever.getScriptCategory(scriptCls, script)
 	scripts = map.get(category, {})
 	return scripts.get(script.__doc__, None)
 
 
+_keyboardSources = None
+
+
+def _getKeyboardSources():
+	"""The translated gesture source names for the keyboard.
+	
+	Returns a tuple: all layouts source name, tuple of per-layout source names.
+	Computed once, on first use.
+	"""
+	global _keyboardSources
+	if _keyboardSources is None:
+		_keyboardSources = (
+			translate("keyboard, all layouts"),
+			tuple(translate("%s keyboard") % layout for layout in KeyboardInputGesture.LAYOUTS)
+		)
+	return _keyboardSources
+
+
 def getScriptInfoMainGestureDetails(scriptInfo):
 	# Default bindings
 	cls = scriptInfo.cls
@@ -126,22 +191,19 @@ def getScriptInfoMainGestureDetails(scriptInfo):
 	del effectiveList
 	del defaultList
 	
-	key = lambda item: item[0]
-	mainBySource = {
-		source: next(items)[1]  # Keep only the first gesture for each source
-		for source, items in groupby(sorted(gesturesList, key=key), key=key)
-	}
-	source = translate("keyboard, all layouts")
+	mainBySource = {}
+	for source, main in gesturesList:
+		mainBySource.setdefault(source, main)  # Keep only the first gesture for each source
+	source, layoutSources = _getKeyboardSources()
 	main = mainBySource.get(source)
 	isKeyboardGesture = True
 	if not main:
-		for layout in KeyboardInputGesture.LAYOUTS:  # Only 1 will match effective bindings
-			source = translate("%s keyboard") % layout
+		for source in layoutSources:  # Only 1 will match effective bindings
 			main = mainBySource.get(source)
 			if main:
 				break
 	if not main:
-		source, main = next(mainBySource.items())
+		source, main = next(iter(mainBySource.items()))
 		isKeyboardGesture = False
 	return isKeyboardGesture, source, main
 
@@ -181,9 +243,8 @@ def overrides(script):
 	def decorator(func):
 		if not func.__doc__:
 			func.__doc__ = script.__doc__
-			for key, value in script.__dict__.items():
-				if key not in func.__dict__:
-					func.__dict__[key] = value
+			# Attributes already set on `func` take precedence
+			func.__dict__ = {**script.__dict__, **func.__dict__}
 		return func
 	
 	return decorator
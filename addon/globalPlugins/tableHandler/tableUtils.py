@@ -26,9 +26,26 @@ __author__ = "Julien Cochuyt <j.cochuyt@accessolutions.fr>"
 __license__ = "GPL"
 
 
+import weakref
+
 from logHandler import log
 
 
+# Spans are fetched from the underlying control (often a COM round-trip) and
+# repeatedly queried for the same cells while navigating a table.
+_columnSpanCache = weakref.WeakKeyDictionary()
+_rowSpanCache = weakref.WeakKeyDictionary()
+
+
+def clearSpanCache():
+	"""Forget about the cached cell spans.
+	
+	To be called when the table layout might have changed.
+	"""
+	_columnSpanCache.clear()
+	_rowSpanCache.clear()
+
+
 def getColumnHeaderTextSafe(cell):
 	try:
 		return cell.columnHeaderText
@@ -36,18 +53,37 @@ def getColumnHeaderTextSafe(cell):
 		return None
 
 
-def getColumnSpanSafe(cell):
+def getColumnSpanSafe(cell, refresh=False):
+	"""The column span of the given cell, defaulting to 1.
+	
+	If `refresh` is set, the span is fetched anew rather than retrieved from the cache.
+	"""
+	if not refresh:
+		try:
+			return _columnSpanCache[cell]
+		except (KeyError, TypeError):
+			pass
+	span = _getColumnSpanSafe(cell)
+	try:
+		_columnSpanCache[cell] = span
+	except TypeError:
+		# Not hashable or not weakly referenceable
+		pass
+	return span
+
+
+def _getColumnSpanSafe(cell):
 	try:
 		span = cell.columnSpan
 		if span is None:
 			span = 1
 		elif span < 1:
-			log.error("cell={}, role={}, columnSpan={}".format(repr(cell), cell.role, span))
+			log.error("cell=%r, role=%s, columnSpan=%s", cell, cell.role, span)
 			span = 1
 	except NotImplementedError:
 		span = 1
 	except Exception:
-		log.exception("cell={}".format(repr(cell)))
+		log.exception("cell=%r", cell)
 		span = 1
 	return span
 
@@ -59,16 +95,35 @@ def getRowHeaderTextSafe(cell):
 		return None
 
 
-def getRowSpanSafe(cell):
+def getRowSpanSafe(cell, refresh=False):
+	"""The row span of the given cell, defaulting to 1.
+	
+	If `refresh` is set, the span is fetched anew rather than retrieved from the cache.
+	"""
+	if not refresh:
+		try:
+			return _rowSpanCache[cell]
+		except (KeyError, TypeError):
+			pass
+	span = _getRowSpanSafe(cell)
+	try:
+		_rowSpanCache[cell] = span
+	except TypeError:
+		# Not hashable or not weakly referenceable
+		pass
+	return span
+
+
+def _getRowSpanSafe(cell):
 	try:
 		span = cell.rowSpan
 		if span < 1:
-			log.error("cell={}, role={}, rowSpan={}".format(repr(cell), cell.role, span))
+			log.error("cell=%r, role=%s, rowSpan=%s", cell, cell.role, span)
 			span = 1
 	except NotImplementedError:
 		span = 1
 	except Exception:
-		log.exception("cell={}".format(repr(cell)))
+		log.exception("cell=%r", cell)
 		span = 1
 	return span
 
@@ -83,3 +138,22 @@ def iterVirtualBufferTableCellsSafe(vbuf, tableID, startPos=None, direction="nex
 			yield item
 	except StopIteration:
 		return
+
+
+def collectVirtualBufferTableCellsSafe(
+	vbuf, tableID, startPos=None, direction="next", row=None, column=None
+):
+	"""Eager variant of :iterVirtualBufferTableCellsSafe:, returning a list.
+	
+	Preferred when the whole row or column is to be consumed anyway.
+	"""
+	items = []
+	try:
+		items.extend(vbuf._iterTableCells(
+			tableID, startPos=startPos, direction=direction, row=row, column=column
+		))
+	except (StopIteration, RuntimeError):
+		# `VirtualBuffer._iterTableCells` raises `StopIteration` when calling `next` unguarded,
+		# turned into `RuntimeError` as it leaks out of the generator (PEP 479).
+		pass
+	return items
@@ -26,6 +26,9 @@ __author__ = "Julien Cochuyt <j.cochuyt@accessolutions.fr>"
 __license__ = "GPL"
 
 
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import islice
 from typing import Optional
 import sys
 
@@ -38,16 +41,47 @@ else:
     from collections.abc import Mapping, Sequence
 
 
+_MISSING = object()
+
+# Kinds of items tagged by `StaticTextInfo`
+_TEXT, _CONTROL_START, _CONTROL_END, _FORMAT_CHANGE, _OTHER_FIELD = range(5)
+
+
+@lru_cache(maxsize=32)
+def getCriteriaPredicate(criteriaItems):
+	"""Build a function telling whether a field matches the given criteria.
+	
+	`criteriaItems` is a tuple of (key, value) pairs.
+	A field matches if, for each key it contains, it has the corresponding value.
+	"""
+	
+	def match(field):
+		get = field.get
+		for key, value in criteriaItems:
+			candidate = get(key, _MISSING)
+			if candidate is not _MISSING and candidate != value:
+				return False
+		return True
+	
+	return match
+
+
 class LaxSelectionTextInfo(textInfos.offsets.OffsetsTextInfo):
 	"""An `OffsetsTextInfo` overlay that treats selection-unawareness as unselected.
 	
 	Allows to query for selection objects that do not implement this feature.
 	"""
 	
+	# Set on the concrete class once it is found not to implement selection
+	_selectionUnsupported = False
+	
 	def _get_selectionOffsets(self):
+		if self._selectionUnsupported:
+			return 0, 0
 		try:
 			return super().selectionOffsets
 		except NotImplementedError:
+			type(self)._selectionUnsupported = True
 			return 0, 0
 
 
@@ -60,36 +94,99 @@ class StaticTextInfo(LaxSelectionTextInfo):
 	# Text is already provided as Python str.
 	encoding = None
 	
+	# Number of text items between two checkpoints of `_getFieldsInRange`
+	checkpointInterval = 64
+	
 	def __init__(self, obj, position, textWithFields: textInfos.TextInfo.TextWithFieldsT):
-		nestingLevel = 0
 		offset = 0
-		lineOffsets = self._lineOffsets = []
-		for textOrField in textWithFields:
+		lineOffsets = []
+		texts = []
+		# The state of `_getFieldsInRange` when reaching a text item before the start of
+		# the requested range: Fields retained so far and unclosed control starts indexes
+		fields = []
+		unclosedControlStartIndexes = []
+		# Offsets and (index in textWithFields, offset, fields, unclosed control starts)
+		checkpointOffsets = [0]
+		checkpoints = [(0, 0, (), ())]
+		# (kind, item) pairs sparing type and command checks to `_getFieldsInRange`
+		taggedItems = []
+		for index, textOrField in enumerate(textWithFields):
 			if isinstance(textOrField, textInfos.FieldCommand):
 				field = textOrField
-				if field.command == "controlStart":
-					nestingLevel += 1
-				elif field.command == "controlEnd":
-					nestingLevel -= 1
-					if nestingLevel < 0:
+				command = field.command
+				if command == "controlStart":
+					taggedItems.append((_CONTROL_START, field))
+					unclosedControlStartIndexes.append(len(fields))
+				elif command == "controlEnd":
+					taggedItems.append((_CONTROL_END, field))
+					if not unclosedControlStartIndexes:
 						raise ValueError("textWithFields contains unmatched controlEnd")
+					del fields[unclosedControlStartIndexes.pop()]
+					continue
+				elif command == "formatChange":
+					taggedItems.append((_FORMAT_CHANGE, field))
+				else:
+					taggedItems.append((_OTHER_FIELD, field))
+				fields.append(field)
 				continue
 			assert isinstance(textOrField, str)
 			text = textOrField
-			chunks = text.split("\n")
-			while len(chunks) > 1:
-				chunk = chunks.pop(0)
-				offset += len(chunk)
-				lineOffset.append(chunk)
-			offset += len(chunks[0])
-		lineOffsets.append(offset)		
-		if nestingLevel > 0:
+			taggedItems.append((_TEXT, text))
+			if texts and not len(texts) % self.checkpointInterval:
+				checkpointOffsets.append(offset)
+				checkpoints.append(
+					(index, offset, tuple(fields), tuple(unclosedControlStartIndexes))
+				)
+			texts.append(text)
+			# Record the offset following each line feed
+			pos = 0
+			while True:
+				lineFeed = text.find("\n", pos)
+				if lineFeed < 0:
+					offset += len(text) - pos
+					break
+				offset += lineFeed - pos + 1
+				lineOffsets.append(offset)
+				pos = lineFeed + 1
+		lineOffsets.append(offset)
+		if unclosedControlStartIndexes:
 			raise ValueError("textWithFields contains unmatched controlStart")
-		self._textWithFields: textInfos.TextInfo.TextWithFieldsT = textWithFields
+		# This state is immutable, hence shared with copies, see `_precomputedAttrs`
+		self._lineOffsets = tuple(lineOffsets)
+		self._checkpointOffsets = tuple(checkpointOffsets)
+		self._checkpoints = tuple(checkpoints)
+		self._textWithFields: textInfos.TextInfo.TextWithFieldsT = tuple(textWithFields)
+		self._taggedItems = tuple(taggedItems)
+		self._storyText = "".join(texts)
+		# The last line returned by `_getLineOffsets`
+		self._lastLineOffsets = (0, 0)
 		super().__init__(obj, position)
 	
+	# The attributes computed at initialization, see `_fromPrecomputed`
+	_precomputedAttrs = (
+		"_lineOffsets",
+		"_checkpointOffsets",
+		"_checkpoints",
+		"_textWithFields",
+		"_taggedItems",
+		"_storyText",
+		"_lastLineOffsets",
+	)
+	
+	@classmethod
+	def _fromPrecomputed(cls, obj, position, source):
+		"""Create a new instance sharing the state precomputed by the given one.
+		
+		Spares re-parsing the text and fields provided at initialization.
+		"""
+		self = cls.__new__(cls)
+		for attr in cls._precomputedAttrs:
+			setattr(self, attr, getattr(source, attr))
+		super(StaticTextInfo, self).__init__(obj, position)
+		return self
+	
 	def copy(self):
-		return self.__class__(self.obj, self.bookmark, self._textWithFields)
+		return self._fromPrecomputed(self.obj, self.bookmark, self)
 	
 	def getTextWithFields(self, formatConfig: Optional[Mapping] = None) -> textInfos.TextInfo.TextWithFieldsT:
 		start = self._startOffset
@@ -99,33 +196,33 @@ class StaticTextInfo(LaxSelectionTextInfo):
 		return self._getFieldsInRange(start, end)
 	
 	def _getFieldsInRange(self, start: int, end: int) -> textInfos.TextInfo.TextWithFieldsT:
-		twf: textInfos.TextInfo.TextWithFieldsT = []
-		offset = 0
-		inRange = False
-		unclosedControlStartIndexes = []
+		# Resume from the last checkpoint preceding the start of the range
+		index, offset, twf, unclosedControlStartIndexes = self._checkpoints[
+			bisect_right(self._checkpointOffsets, start) - 1
+		]
+		twf: textInfos.TextInfo.TextWithFieldsT = list(twf)
+		unclosedControlStartIndexes = list(unclosedControlStartIndexes)
 		rangeStartIndex = rangeEndIndex = None
-		for textOrField in self._textWithFields:
-			if isinstance(textOrField, textInfos.FieldCommand):
-				field = textOrField
-				if field.command == "controlStart":
+		for kind, item in islice(self._taggedItems, index, None):
+			if kind != _TEXT:
+				if kind == _CONTROL_START:
 					unclosedControlStartIndexes.append(len(twf))
 					if rangeEndIndex is not None:
 						continue
-				elif field.command == "controlEnd":
+				elif kind == _CONTROL_END:
 					controlStartIndex = unclosedControlStartIndexes.pop()
 					if rangeStartIndex is None:
 						del twf[controlStartIndex]
 						continue
 					if rangeEndIndex is not None and controlStartIndex >= rangeEndIndex:
 						continue
-				elif field.command == "formatChange" and rangeEndIndex is not None:
+				elif kind == _FORMAT_CHANGE and rangeEndIndex is not None:
 					continue
-				twf.append(field)
+				twf.append(item)
 				continue
-			assert isinstance(textOrField, str)
 			if rangeEndIndex is not None:
 				continue
-			text = textOrField
+			text = item
 			chunkStart = max(0, start - offset)
 			chunkEnd = max(0, end - offset)
 			chunk = text[chunkStart:chunkEnd]
@@ -139,39 +236,30 @@ class StaticTextInfo(LaxSelectionTextInfo):
 		return twf
 	
 	def _getLineOffsets(self, offset):
-		start = end = 0
-		for candidate in self._lineOffsets:
-			if candidate <= offset:
-				start = candidate
-			elif candidate > offset:
-				end = candidate
-				break
+		start, end = self._lastLineOffsets
+		if start <= offset < end:
+			# Most often, consecutive queries hit the same line
+			return start, end
+		lineOffsets = self._lineOffsets
+		index = bisect_right(lineOffsets, offset)
+		start = lineOffsets[index - 1] if index else 0
+		if index < len(lineOffsets):
+			end = lineOffsets[index]
 		else:
 			# Mimic the behavior of OffsetsTextInfo when offset exceeds
 			# the story length.
-			end = self._lineOffsets[-1]
+			end = lineOffsets[-1]
+		self._lastLineOffsets = start, end
 		return start, end
 	
 	def _getTextRange(self, start, end):
-		return "".join(
-			textOrField
-			for textOrField in self._getFieldsInRange(start, end)
-			if isinstance(textOrField, str)
-		)
+		return self._storyText[start:end]
 	
 	def _getStoryText(self):
-		return "".join(
-			textOrField
-			for textOrField in self._textWithFields
-			if isinstance(textOrField, str)
-		)
-
+		return self._storyText
+	
 	def _getStoryLength(self):
-		return sum(
-			len(textOrField)
-			for textOrField in self._textWithFields
-			if isinstance(textOrField, str)
-		)
+		return len(self._storyText)
 
 
 class WindowedProxyTextInfo(textInfos.offsets.OffsetsTextInfo):
@@ -179,6 +267,13 @@ class WindowedProxyTextInfo(textInfos.offsets.OffsetsTextInfo):
 	def __init__(self, obj, position, proxied=None, **containerCriteria):
 		self.proxied = proxied
 		self.containerCriteria = containerCriteria
+		self._containerCriteriaMatch = getCriteriaPredicate(tuple(containerCriteria.items()))
+		# Proxied offsets and the corresponding copy, see `_getProxiedSlice`
+		self._proxiedSliceCache = (None, None)
+		# See `_getLineNumFromOffset`
+		self._startLineNum = None
+		# Offsets and the corresponding index, see `getFieldsByCommand`
+		self._fieldsByCommandCache = (None, None)
 		super().__init__(obj, position)
 		if position == textInfos.POSITION_ALL:
 			self._startOffset = 0
@@ -187,10 +282,7 @@ class WindowedProxyTextInfo(textInfos.offsets.OffsetsTextInfo):
 			self._startOffset = self._endOffset = 0
 	
 	def activate(self):
-		info = self.proxied.copy()
-		info._startOffset, info._endOffset = self._convertToProxiedOffsets(
-			self._startOffset, self._endOffset
-		)
+		info = self._getProxiedSlice()
 		return info.activate()
 	
 	def copy(self):
@@ -201,6 +293,20 @@ class WindowedProxyTextInfo(textInfos.offsets.OffsetsTextInfo):
 			**self.containerCriteria
 		)
 	
+	def _getProxiedSlice(self):
+		"""A copy of the proxied TextInfo restricted to the range of this instance.
+		
+		The copy is reused as long as this range does not change.
+		It is not to be altered by the caller.
+		"""
+		offsets = self._convertToProxiedOffsets(self._startOffset, self._endOffset)
+		cachedOffsets, info = self._proxiedSliceCache
+		if offsets != cachedOffsets:
+			info = self.proxied.copy()
+			info._startOffset, info._endOffset = offsets
+			self._proxiedSliceCache = (offsets, info)
+		return info
+	
 	def _getProxiedAllowMoveToOffsetPastEnd(self):
 		# NVDA 2026.1 (#19152) replaced the `allowMoveToOffsetPastEnd` property
 		# with the `allowMoveToUnitOffsetPastEnd(unit)` method.
@@ -209,28 +315,71 @@ class WindowedProxyTextInfo(textInfos.offsets.OffsetsTextInfo):
 			return method(textInfos.UNIT_CHARACTER)
 		return self.proxied.allowMoveToOffsetPastEnd
 	
+	def _resolveBounds(self):
+		"""The start and end offsets of the window within the proxied TextInfo.
+		
+		The end offset accounts for the eventual ability to move past the end.
+		"""
+		proxied = self.proxied
+		startOffset = proxied._startOffset
+		endOffset = proxied._endOffset
+		if self._getProxiedAllowMoveToOffsetPastEnd():
+			endOffset += 1
+		return startOffset, endOffset
+	
 	def _convertFromProxiedOffset(self, offset):
-		startOffset = self.proxied._startOffset
-		endOffset = self.proxied._endOffset + (1 if self._getProxiedAllowMoveToOffsetPastEnd() else 0)
-		return max(0, min(offset, endOffset) - startOffset)
+		startOffset, endOffset = self._resolveBounds()
+		if offset > endOffset:
+			offset = endOffset
+		offset -= startOffset
+		return offset if offset > 0 else 0
 	
 	def _convertFromProxiedOffsets(self, *offsets):
-		return tuple((self._convertFromProxiedOffset(offset) for offset in offsets))
+		startOffset, endOffset = self._resolveBounds()
+		if len(offsets) == 2:
+			# Most common case: start and end offsets
+			start, end = offsets
+			start = (start if start < endOffset else endOffset) - startOffset
+			end = (end if end < endOffset else endOffset) - startOffset
+			return start if start > 0 else 0, end if end > 0 else 0
+		converted = []
+		for offset in offsets:
+			if offset > endOffset:
+				offset = endOffset
+			offset -= startOffset
+			converted.append(offset if offset > 0 else 0)
+		return tuple(converted)
 	
 	def _convertToProxiedOffset(self, offset):
-		startOffset = self.proxied._startOffset
-		endOffset = self.proxied._endOffset + (1 if self._getProxiedAllowMoveToOffsetPastEnd() else 0)
+		startOffset, endOffset = self._resolveBounds()
 		offset += startOffset
-		return max(startOffset, min(endOffset, offset))
+		if offset < startOffset:
+			return startOffset
+		return offset if offset < endOffset else endOffset
 	
 	def _convertToProxiedOffsets(self, *offsets):
-		return tuple((self._convertToProxiedOffset(offset) for offset in offsets))
+		startOffset, endOffset = self._resolveBounds()
+		if len(offsets) == 2:
+			# Most common case: start and end offsets
+			start, end = offsets
+			start += startOffset
+			end += startOffset
+			return (
+				startOffset if start < startOffset else start if start < endOffset else endOffset,
+				startOffset if end < startOffset else end if end < endOffset else endOffset,
+			)
+		converted = []
+		for offset in offsets:
+			offset += startOffset
+			if offset < startOffset:
+				offset = startOffset
+			elif offset > endOffset:
+				offset = endOffset
+			converted.append(offset)
+		return tuple(converted)
 	
 	def _get_boundingRects(self):
-		info = self.proxied.copy()
-		info._startOffset, info._endOffset = self._convertToProxiedOffsets(
-			self._startOffset, self._endOffset
-		)
+		info = self._getProxiedSlice()
 		return info.boundingRects
 	
 	def _getCaretOffset(self):
@@ -282,7 +431,12 @@ class WindowedProxyTextInfo(textInfos.offsets.OffsetsTextInfo):
 		curNum = self.proxied._getLineNumFromOffset(self._convertToProxiedOffset(offset))
 		if curNum is None:
 			return None
-		startNum = self.proxied._getLineNumFromOffset(self._convertToProxiedOffset(0))
+		startNum = self._startLineNum
+		if startNum is None:
+			# The start of the window does not move within the proxied TextInfo
+			startNum = self._startLineNum = self.proxied._getLineNumFromOffset(
+				self._convertToProxiedOffset(0)
+			)
 		return curNum - startNum
 	
 	def _getLineOffsets(self, offset):
@@ -321,10 +475,7 @@ class WindowedProxyTextInfo(textInfos.offsets.OffsetsTextInfo):
 		return self._convertFromProxiedOffsets(*self.proxied._getOffsetsFromNVDAObject(obj))
 	
 	def _get_NVDAObjectAtStart(self):
-		info = self.proxied.copy()
-		info._startOffset, info._endOffset = self._convertToProxiedOffsets(
-			self._startOffset, self._endOffset
-		)
+		info = self._getProxiedSlice()
 		obj = info.NVDAObjectAtStart
 		if obj is self.proxied.obj:
 			return self.obj
@@ -336,21 +487,35 @@ class WindowedProxyTextInfo(textInfos.offsets.OffsetsTextInfo):
 		)
 	
 	def _get_pointAtStart(self):
-		info = self.proxied.copy()
-		info._startOffset, info._endOffset = self._convertToProxiedOffsets(
-			self._startOffset, self._endOffset
-		)
+		info = self._getProxiedSlice()
 		return info.pointAtStart
 	
+	def getFieldsByCommand(self, command):
+		"""The fields of the given command within the current range, in order.
+		
+		All commands are indexed in a single pass, reused as long as the range does not change.
+		"""
+		offsets = (self._startOffset, self._endOffset)
+		cachedOffsets, fieldsByCommand = self._fieldsByCommandCache
+		if offsets != cachedOffsets:
+			fieldsByCommand = {}
+			for textOrField in self.iterTextWithFields():
+				if isinstance(textOrField, textInfos.FieldCommand):
+					fieldsByCommand.setdefault(textOrField.command, []).append(textOrField.field)
+			self._fieldsByCommandCache = (offsets, fieldsByCommand)
+		return fieldsByCommand.get(command, ())
+	
 	def getTextWithFields(self, formatConfig=None):
 		return list(self.iterTextWithFields(formatConfig=formatConfig))
 	
 	def iterTextWithFields(self, formatConfig=None):
-		info = self.proxied.copy()
-		info._startOffset, info._endOffset = self._convertToProxiedOffsets(
-			self._startOffset, self._endOffset
-		)
-		found = not self.containerCriteria
+		info = self._getProxiedSlice()
+		if not self.containerCriteria:
+			# No container to look for: The whole range is relevant.
+			yield from info.getTextWithFields(formatConfig=formatConfig)
+			return
+		match = self._containerCriteriaMatch
+		found = False
 		level = 0
 		for textOrField in info.getTextWithFields(formatConfig=formatConfig):
 			if isinstance(textOrField, textInfos.FieldCommand):
@@ -358,11 +523,7 @@ class WindowedProxyTextInfo(textInfos.offsets.OffsetsTextInfo):
 				if field.command == "controlStart":
 					field = field.field
 					if not found:
-						for key, value in self.containerCriteria.items():
-							if key in field and field[key] != value:
-								break
-						else:
-							found = True
+						found = match(field)
 						continue
 					level += 1
 				elif found and field.command == "controlEnd":
@@ -380,17 +541,11 @@ class WindowedProxyTextInfo(textInfos.offsets.OffsetsTextInfo):
 		return -1
 	
 	def _getFirstVisibleOffset(self):
-		info = self.proxied.copy()
-		info._startOffset, info._endOffset = self._convertToProxiedOffsets(
-			self._startOffset, self._endOffset
-		)
+		info = self._getProxiedSlice()
 		return self._convertFromProxiedOffset(info._getFirstVisibleOffset())
 	
 	def _getLastVisibleOffset(self):
-		info = self.proxied.copy()
-		info._startOffset, info._endOffset = self._convertToProxiedOffsets(
-			self._startOffset, self._endOffset
-		)
+		info = self._getProxiedSlice()
 		return self._convertFromProxiedOffset(info._getLastVisibleOffset())
 
 
@@ -398,6 +553,16 @@ def getField(info, command, **criteria):
 	if info.isCollapsed:
 		info = info.copy()
 		info.expand(textInfos.UNIT_CHARACTER)
+	match = getCriteriaPredicate(tuple(criteria.items()))
+	getFieldsByCommand = getattr(info, "getFieldsByCommand", None)
+	if getFieldsByCommand is not None:
+		# Indexed by command: Skip text and fields of other commands.
+		for field in reversed(getFieldsByCommand(command)):
+			if match(field):
+				return field
+		return None
+	# `getTextWithFields` returns a list: Walking it backwards does not copy it
+	# and allows to stop at the innermost match.
 	for cmdField in reversed(info.getTextWithFields()):
 		if not (
 			isinstance(cmdField, textInfos.FieldCommand)
@@ -405,8 +570,5 @@ def getField(info, command, **criteria):
 		):
 			continue
 		field = cmdField.field
-		for key, value in criteria.items():
-			if key in field and field[key] != value:
-				break
-		else:
+		if match(field):
 			return field
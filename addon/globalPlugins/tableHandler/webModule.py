@@ -28,6 +28,7 @@ __license__ = "GPL"
 
 from collections.abc import Mapping
 from functools import partial
+from types import MethodType
 from typing import Any
 import weakref
 
@@ -56,34 +57,191 @@ addonHandler.initTranslation()
 
 class TableHandlerWebModuleScriptWrapper(TableHandlerBmdtiScriptWrapper):
 	
+	__slots__ = ("_tiRef",)
+	
 	def __init__(self, ti, script, **defaults):
 		# The base class uses the default "script" arg, but it conflicts with WebAccess' actions which also
 		# receives a "script" arg.
 		super().__init__(ti, script, arg="script_", **defaults)
+	
+	# These wrappers are registered on WebModule and result instances, see
+	# `ScriptWrappingMixin._getScriptWrapper`: Only weakly reference the TreeInterceptor.
+	
+	@property
+	def __self__(self):
+		return self._tiRef()
+	
+	@__self__.setter
+	def __self__(self, ti):
+		self._tiRef = weakref.ref(ti)
+
+
+class _WeakBoundMethod:
+	"""A function bound to an instance through a weak reference.
+	
+	Other attributes are looked up on the function, as for a bound method.
+	"""
+	
+	__slots__ = ("__func__", "_selfRef")
+	
+	def __init__(self, func, obj):
+		self.__func__ = func
+		self._selfRef = weakref.ref(obj)
+	
+	def __call__(self, *args, **kwargs):
+		obj = self._selfRef()
+		if obj is None:
+			raise ReferenceError("weakly-referenced object no longer exists")
+		return self.__func__(obj, *args, **kwargs)
+	
+	def __getattr__(self, name):
+		if name == "__func__":
+			# Not initialized yet
+			raise AttributeError(name)
+		return getattr(self.__func__, name)
+	
+	@property
+	def __doc__(self):
+		return self.__func__.__doc__
+	
+	@property
+	def __self__(self):
+		return self._selfRef()
+	
+	def __repr__(self):
+		return f"<weakly bound method {self.__func__.__qualname__} of {self._selfRef()!r}>"
 
 
-class TableHandlerWebModule(WebModule, DocumentTableHandler):
+class ScriptWrappingMixin:
+	"""Wrap scripts upon retrieval so that they honor table mode.
+	
+	Subclasses implement `_getNodeManager`.
+	"""
+	
+	# Prefixes of the names of the attributes to wrap
+	_wrappedPrefixes = ("script_",)
+	
+	def __init_subclass__(cls, **kwargs):
+		super().__init_subclass__(**kwargs)
+		# The next `__getattribute__` in the MRO, resolved once per class rather than
+		# building a `super` proxy on each attribute access
+		cls._nextGetattribute = super(ScriptWrappingMixin, cls).__getattribute__
+		# Initial letters of `_wrappedPrefixes`, see `__getattribute__`
+		cls._wrappedInitials = frozenset(prefix[:1] for prefix in cls._wrappedPrefixes)
+	
+	def __init__(self, *args, **kwargs):
+		# Maps script name to (function, wrapper), see `_getScriptWrapper`
+		self._scriptWrappers = {}
+		self._tiRef = None
+		super().__init__(*args, **kwargs)
+	
+	def __getattribute__(self, name):
+		cls = type(self)
+		# The initial letter check spares most attributes the prefix matching
+		if name[:1] not in cls._wrappedInitials or not name.startswith(cls._wrappedPrefixes):
+			# Most common path: Leave as soon as possible
+			return cls._nextGetattribute(self, name)
+		value = cls._nextGetattribute(self, name)
+		if isinstance(value, TableHandlerBmdtiScriptWrapper):
+			return value
+		try:
+			ti = self._getTi()
+		except AttributeError:
+			# Either the first NodeManager update did not finish yet or a rule is
+			# being edited offline.
+			return value
+		if ti is None:
+			# The NodeManager is not bound to a TreeInterceptor
+			return value
+		return self._getScriptWrapper(ti, name, value)
+	
+	def _getScriptWrapper(self, ti, name, value):
+		"""Retrieve the wrapper registered for this script, or register a new one.
+		
+		Only methods bound to this instance are registered. The registered wrapper
+		references neither this instance nor the TreeInterceptor, so that the
+		registry does not create reference cycles.
+		It is reused as long as both the TreeInterceptor and the underlying
+		function are unchanged.
+		"""
+		if not (isinstance(value, MethodType) and value.__self__ is self):
+			return TableHandlerWebModuleScriptWrapper(ti, value)
+		func = value.__func__
+		wrappers = self._scriptWrappers
+		entry = wrappers.get(name)
+		if entry is not None and entry[0] is func:
+			wrapper = entry[1]
+			if wrapper.__self__ is ti:
+				return wrapper
+		wrapper = TableHandlerWebModuleScriptWrapper(ti, _WeakBoundMethod(func, self))
+		wrappers[name] = (func, wrapper)
+		return wrapper
+	
+	def _getNodeManager(self):
+		raise NotImplementedError
+	
+	def _getTi(self):
+		"""Retrieve the TreeInterceptor this instance is bound to.
+		
+		It is resolved through the NodeManager and then kept as a weak reference.
+		Raises `AttributeError` if the first NodeManager update did not finish yet
+		or if a rule is being edited offline.
+		"""
+		ref = self._tiRef
+		ti = ref() if ref is not None else None
+		if ti is None:
+			ti = self._getNodeManager().treeInterceptor
+			if ti is not None:
+				self._tiRef = weakref.ref(ti)
+		return ti
+
+
+# Names of the `TableHandlerWebModule` methods taking a `nextHandler` called by tables and cells
+_TABLE_HOOKS = (
+	"getRowCount",
+	"getColumnCount",
+	"getRowHeaderText",
+	"getColumnHeaderText",
+	"getCellStates",
+	"makeCellTextInfo",
+)
+
+
+class TableHandlerWebModule(ScriptWrappingMixin, WebModule, DocumentTableHandler):
 	
 	# Maps Rule name to TableConfig data
 	tableConfigs: Mapping[str, Mapping[str, Any]] = {}
 	
+	_wrappedPrefixes = ("script_", "action_")
+	
+	# Whether `getTableManager` is overridden, see `__init_subclass__`
+	_getTableManagerIsOverridden = False
+	
+	# Names of the overridden hooks among `_TABLE_HOOKS`, see `__init_subclass__`
+	_overriddenTableHooks = frozenset()
+	
+	def __init_subclass__(cls, **kwargs):
+		super().__init_subclass__(**kwargs)
+		# Computed once per class rather than scanning the MRO on each table lookup
+		cls._getTableManagerIsOverridden = next(
+			base for base in cls.__mro__
+			if "getTableManager" in base.__dict__
+		) is not cls
+		# Non-overridden hooks are skipped by tables and cells altogether
+		cls._overriddenTableHooks = frozenset(
+			name for name in _TABLE_HOOKS
+			if getattr(cls, name) is not getattr(TableHandlerWebModule, name)
+		)
+	
 	def __init__(self):
 		super().__init__()
 		self.tableIDs = weakref.WeakValueDictionary()
+		# Interned table config keys, by rule name
+		self._tableConfigKeys = {}
 	
-	def __getattribute__(self, name):
-		value = super().__getattribute__(name)
-		if (name.startswith("script_") or name.startswith("action_")) and not isinstance(
-			value, TableHandlerBmdtiScriptWrapper
-		):
-			try:
-				ti = self.ruleManager.nodeManager.treeInterceptor
-			except AttributeError:
-				# Either the first NodeManager update did not finish yet or a rule is
-				# being edited offline.
-				return value
-			return TableHandlerWebModuleScriptWrapper(ti, value)
-		return value
+	def _getNodeManager(self):
+		# WebAccess creates a WebModule instance per TreeInterceptor
+		return self.ruleManager.nodeManager
 	
 	def createRule(self, data):
 		if data.get("name") in self.tableConfigs:
@@ -94,7 +252,8 @@ class TableHandlerWebModule(WebModule, DocumentTableHandler):
 		return super().createRule(data)
 	
 	def getTableConfig(self, nextHandler=None, **kwargs):
-		if kwargs.get("debug"):
+		debug = kwargs.get("debug")
+		if debug:
 			log.info(f">>> THWM.getTableConfig({kwargs})")
 		
 		key = kwargs.get("key")
@@ -104,29 +263,42 @@ class TableHandlerWebModule(WebModule, DocumentTableHandler):
 		cfg = nextHandler(**kwargs)
 		
 		if isinstance(key, Mapping) and "webModule" in key:
-			wmDefaults = self.tableConfigs.get("")
-			if wmDefaults:
-				cfg.map.maps.insert(1, wmDefaults)
+			# Layered right under the user settings: Rule defaults, then WebModule defaults
+			layers = []
 			ruleName = key["webModule"].get("rule")
 			if ruleName:
 				ruleDefaults = self.tableConfigs.get(ruleName)
 				if ruleDefaults:
-					cfg.map.maps.insert(1, ruleDefaults)
+					layers.append(ruleDefaults)
+			wmDefaults = self.tableConfigs.get("")
+			if wmDefaults:
+				layers.append(wmDefaults)
+			maps = cfg.map.maps
+			# TableConfig instances are cached: Only layer the defaults once
+			layers = [layer for layer in layers if not any(map is layer for map in maps)]
+			if layers:
+				maps[1:1] = layers
 		
-		if kwargs.get("debug"):
+		if debug:
 			log.info(f"<<< THWM.getTableConfig: {cfg}")
 		return cfg
 	
 	def getTableConfigKey(self, nextHandler=None, **kwargs):
-		if kwargs.get("debug"):
+		debug = kwargs.get("debug")
+		if debug:
 			log.info(f">>> THWM.getTableConfigKey({kwargs})")
 		
 		result = kwargs.get("result")
 		if result:
-			key = {"webModule": {"rule": result.rule.name}}
+			ruleName = result.rule.name
+			key = self._tableConfigKeys.get(ruleName)
+			if key is None:
+				key = self._tableConfigKeys[ruleName] = {
+					"webModule": {"rule": ruleName, "name": self.name}
+				}
 		else:
 			key = nextHandler(**kwargs)
-			if kwargs.get("debug"):
+			if debug:
 				log.info(f"THWM.getTableConfigKey - Retrieved from next handler: {key}")
 			if not isinstance(key, Mapping):
 				try:
@@ -134,52 +306,67 @@ class TableHandlerWebModule(WebModule, DocumentTableHandler):
 				except AssertionError:
 					log.exception(f"key: {key}")
 				key = {}
-		key.setdefault("webModule", {})["name"] = self.name
+			key.setdefault("webModule", {})["name"] = self.name
 		
-		if kwargs.get("debug"):
+		if debug:
 			log.info(f"<<< THWM.getTableConfigKey: {key!r}")
 		return key
 	
 	def getTableManager(self, nextHandler=None, **kwargs):
-		if kwargs.get("debug"):
+		debug = kwargs.get("debug")
+		if debug:
 			log.info(f">>> THWM.getTableManager({kwargs})")
 		
-		if not self.ruleManager.isReady:
-			if kwargs.get("debug"):
+		ruleManager = self.ruleManager
+		if not ruleManager.isReady:
+			if debug:
 				log.info("THWM.getTableManager: not ready")
 			return nextHandler(**kwargs)
 		ti = kwargs.get("ti")
 		if ti is None:
-			ti = kwargs["ti"] = self.ruleManager.nodeManager.treeInterceptor
+			ti = kwargs["ti"] = self._getTi()
 		info = kwargs.get("info")
 		if info is None:
 			info = kwargs["info"] = ti.selection
-		result = kwargs.get("result")
+		givenResult = result = kwargs.get("result")
+		if result is None:
+			# The table coordinates are computed here ahead of the TreeInterceptor handler,
+			# which then reuses them from `kwargs`.
+			setDefaultTableKwargs = getattr(ti, "setDefaultTableKwargs", None)
+			if setDefaultTableKwargs is not None:
+				setDefaultTableKwargs(kwargs)
+			tableID = kwargs.get("tableID")
+			if tableID is not None:
+				result = self.tableIDs.get(tableID)
+				if result is not None and not self._isCurrentResult(result):
+					if debug:
+						log.info(f"THWM.getTableManager: Outdated result: {result}")
+					self.tableIDs.pop(tableID, None)
+					result = None
+				if result is not None and debug:
+					log.info(f"THWM.getTableManager: Known table: {result}")
 		if result is None:
-			for result in self.ruleManager.iterResultsAtTextInfo(info):
+			for result in ruleManager.iterResultsAtTextInfo(info):
 				if isinstance(result, TableHandlerResult):
-					if kwargs.get("debug"):
+					if debug:
 						log.info(f"THWM.getTableManager: Result at position: {result}")
 					break
 			else:
-				if kwargs.get("debug"):
+				if debug:
 					log.info("THWM.getTableManager: No result at position")
 				result = None
 		if result is not None:
-			if kwargs.get("result") is None:
+			if givenResult is None:
 				kwargs["result"] = result
 				if (
 					"getTableManager" in self.__dict__
-					or next(
-						base for base in self.__class__.__mro__
-						if "getTableManager" in base.__dict__
-					) is not self.__class__
+					or self.__class__._getTableManagerIsOverridden
 				):
 					# This method is overridden
-					if kwargs.get("debug"):
+					if debug:
 						log.info(f"THWM.getTableManager: Re-launch with result")
 					res = self.getTableManager(nextHandler=nextHandler, **kwargs)
-					if kwargs.get("debug"):
+					if debug:
 						log.info(f"<<< THWM.getTableManager: {res}")
 					return res
 			cls = kwargs.get("tableManagerClass")
@@ -191,10 +378,27 @@ class TableHandlerWebModule(WebModule, DocumentTableHandler):
 		res = nextHandler(**kwargs)
 		if result is not None and isinstance(res, WebModuleTableManager):
 			res.result = result
-		if kwargs.get("debug"):
+			self.tableIDs[res.tableID] = result
+		if debug:
 			log.info(f"<<< THWM.getTableManager: {res} / {res!r}")
 		return res
 	
+	def _isCurrentResult(self, result):
+		"""Whether the given result stems from the latest NodeManager update.
+		
+		Results from earlier updates may still be alive, referring to outdated nodes.
+		"""
+		rule = result.rule
+		try:
+			results = self.ruleManager.getRule(rule.name, layer=rule.layer).getResults()
+			return results[result.index - 1] is result  # Result index is 1-based
+		except (LookupError, AttributeError):
+			# The rule or the result no longer exists
+			return False
+		except Exception:
+			log.exception(f"result: {result!r}")
+			return False
+	
 	def getTableManagerClass(self, result) -> type["TableManager"]:
 		# Need to be keyword arguments here because
 		# NVDAObject.__call__ passes only these to __init__.
@@ -231,16 +435,11 @@ class TableHandlerRule(Rule):
 		return TableHandlerResult(criteria, node, context, index)
 
 
-class TableHandlerResult(SingleNodeResult):
+class TableHandlerResult(ScriptWrappingMixin, SingleNodeResult):
 	
-	def __getattribute__(self, name):
-		value = super().__getattribute__(name)
-		if name.startswith("script_") and not isinstance(
-			value, TableHandlerBmdtiScriptWrapper
-		):
-			ti = self.rule.ruleManager.nodeManager.treeInterceptor
-			return TableHandlerWebModuleScriptWrapper(ti, value)
-		return value
+	def _getNodeManager(self):
+		# A result does not outlive the NodeManager update that produced it
+		return self.rule.ruleManager.nodeManager
 	
 	@overrides(SingleNodeResult.script_moveto)
 	def script_moveto(self, gesture, **kwargs):
@@ -302,15 +501,21 @@ class WebModuleTableManager(VirtualBufferTableManager):
 		self._result = weakref.ref(result)
 	
 	def _get_rowCount(self):
-		return self.webModule.getRowCount(
+		webModule = self.webModule
+		if "getRowCount" not in webModule._overriddenTableHooks:
+			return super()._get_rowCount()
+		return webModule.getRowCount(
 			self.result,
-			nextHandler=lambda: super(WebModuleTableManager, self).rowCount
+			nextHandler=super()._get_rowCount
 		)
 	
 	def _get_columnCount(self):
-		return self.webModule.getColumnCount(
+		webModule = self.webModule
+		if "getColumnCount" not in webModule._overriddenTableHooks:
+			return super()._get_columnCount()
+		return webModule.getColumnCount(
 			self.result,
-			nextHandler=lambda: super(WebModuleTableManager, self).columnCount
+			nextHandler=super()._get_columnCount
 		)
 
 
@@ -324,33 +529,49 @@ class WebModuleFakeRow(DocumentFakeRow):
 class WebModuleFakeCell(DocumentFakeCell):
 	
 	def _get_states(self):
-		return self.table.webModule.getCellStates(
-			self.table.result,
+		table = self.table
+		webModule = table.webModule
+		if "getCellStates" not in webModule._overriddenTableHooks:
+			return super()._get_states()
+		return webModule.getCellStates(
+			table.result,
 			self.rowNumber,
 			self.columnNumber,
-			nextHandler=lambda: super(WebModuleFakeCell, self)._get_states()
+			nextHandler=super()._get_states
 		)
 	
 	def getColumnHeaderText(self):
-		return self.table.webModule.getColumnHeaderText(
-			self.table.result,
+		table = self.table
+		webModule = table.webModule
+		if "getColumnHeaderText" not in webModule._overriddenTableHooks:
+			return super().getColumnHeaderText()
+		return webModule.getColumnHeaderText(
+			table.result,
 			self.columnNumber,
-			nextHandler=lambda: super(WebModuleFakeCell, self).getColumnHeaderText()
+			nextHandler=super().getColumnHeaderText
 		)
 
 	def getRowHeaderText(self):
-		return self.table.webModule.getRowHeaderText(
-			self.table.result,
+		table = self.table
+		webModule = table.webModule
+		if "getRowHeaderText" not in webModule._overriddenTableHooks:
+			return super().getRowHeaderText()
+		return webModule.getRowHeaderText(
+			table.result,
 			self.rowNumber,
-			nextHandler=lambda: super(WebModuleFakeCell, self).getRowHeaderText()
+			nextHandler=super().getRowHeaderText
 		)
 	
 	def makeTextInfo(self, position):
-		return self.table.webModule.makeCellTextInfo(
+		table = self.table
+		webModule = table.webModule
+		if "makeCellTextInfo" not in webModule._overriddenTableHooks:
+			return super().makeTextInfo(position)
+		return webModule.makeCellTextInfo(
 			self,
 			position,
-			self.table.result,
+			table.result,
 			self.rowNumber,
 			self.columnNumber,
-			nextHandler=lambda: super(WebModuleFakeCell, self).makeTextInfo(position)
+			nextHandler=partial(super().makeTextInfo, position)
 		)
@@ -47,60 +47,58 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 		speech.speech.speak = _speak
 	
 	def terminate(self):
-		setter = lambda value: setattr(queueHandler, "queueFunction", value)
-		obj = queueHandler.queueFunction
-		while True:
-			if obj is not _queueFunction:
-				if not hasattr(obj, "super"):
-					log.error("Monkey-patch has been overridden: queueHandler.queueFunction")
-					queueHandler.queueFunction = obj
-					break
-				setter = lambda value, obj=obj: setattr(obj, "super", value)
-				obj = obj.super
-				continue
-			setter(obj.super)
-			break
-		setter = lambda value: setattr(speech, "speak", value)
-		obj = speech.speak
-		while True:
-			if obj is not _speak:
-				if not hasattr(obj, "super"):
-					log.error("Monkey-patch has been overridden: speech.speak")
-					speech.speak = obj
-					break
-				setter = lambda value, obj=obj: setattr(obj, "super", value)
-				obj = obj.super
-				continue
-			setter(obj.super)
-			break
-		setter = lambda value: setattr(speech.speech, "speak", value)
-		obj = speech.speech.speak
-		while True:
-			if obj is not _speak:
-				if not hasattr(obj, "super"):
-					log.error("Monkey-patch has been overridden: speech.speech.speak")
-					speech.speech.speak = obj
-					break
-				setter = lambda value, obj=obj: setattr(obj, "super", value)
-				obj = obj.super
-				continue
-			setter(obj.super)
-			break
-
-
-
-_activeContextsByThread = {}
-
-
-def _queueFunction(queue, func, *args, **kwargs):
-	ctx = _activeContextsByThread.get(threading.get_ident())
+		_unpatch(queueHandler, "queueFunction", _queueFunction, "queueHandler.queueFunction")
+		_unpatch(speech, "speak", _speak, "speech.speak")
+		_unpatch(speech.speech, "speak", _speak, "speech.speech.speak")
+
+
+def _unpatch(holder, attrName, patch, label):
+	"""Remove the given monkey-patch from the chain of patches of the given attribute.
+	
+	Patches applied later on top of ours are expected to expose the patched
+	function as their `super` attribute.
+	"""
+	prev = None
+	obj = getattr(holder, attrName)
+	while obj is not patch:
+		if not hasattr(obj, "super"):
+			log.error(f"Monkey-patch has been overridden: {label}")
+			setattr(holder, attrName, obj)
+			return
+		prev = obj
+		obj = obj.super
+	if prev is None:
+		setattr(holder, attrName, patch.super)
+	else:
+		prev.super = patch.super
+
+
+# Holds the innermost active context of each thread as its `context` attribute
+_local = threading.local()
+# Number of active contexts across all threads.
+# When zero, which is the most common case, the thread-local lookup is skipped.
+_activeContextsCount = 0
+_activeContextsCountLock = threading.Lock()
+
+
+# `_local` is bound as a keyword-only default of the patches below so that it
+# is looked up as a local on these hot paths.
+# `_activeContextsCount` is rebound, hence still looked up as a global.
+
+
+def _queueFunction(queue, func, *args, _local=_local, **kwargs):
+	if not _activeContextsCount:
+		return _queueFunction.super(queue, func, *args, **kwargs)
+	ctx = getattr(_local, "context", None)
 	if ctx and ctx.propagates:
-		func = _decorator(func, ctx.increment)
+		func = _MutedCall(func, ctx.increment)
 	return _queueFunction.super(queue, func, *args, **kwargs)
 
 
-def _speak(*args, **kwargs):
-	ctx = _activeContextsByThread.get(threading.get_ident())
+def _speak(*args, _local=_local, **kwargs):
+	if not _activeContextsCount:
+		return _speak.super(*args, **kwargs)
+	ctx = getattr(_local, "context", None)
 	if ctx and ctx.level < 0:
 		ctx.mute(_speak, *args, **kwargs)
 		return
@@ -109,32 +107,35 @@ def _speak(*args, **kwargs):
 
 class _SpeechContextManager:
 	
+	__slots__ = ("active", "increment", "retains", "propagates", "muted", "parent", "level")
+	
 	def __init__(self, increment, retains=False, propagates=True):
-		if not isinstance(increment, int):
-			raise ValueError("increment={!r}".format(increment))
+		# `increment` is validated by the public factories
 		self.active = False
 		self.increment = increment
 		self.retains = retains
 		self.propagates = propagates
-		self.muted = []
+		# Only ever filled when retaining
+		self.muted = [] if retains else None
 	
 	def __enter__(self):
-		ident = threading.get_ident()
-		parent = self.parent = _activeContextsByThread.get(ident)
+		global _activeContextsCount
+		parent = self.parent = getattr(_local, "context", None)
 		increment = self.increment
 		self.level = (parent.level if parent else 0) + increment
-		self.muted = []
+		if self.retains:
+			self.muted = []
 		self.active = True
-		_activeContextsByThread[ident] = self
+		with _activeContextsCountLock:
+			_activeContextsCount += 1
+		_local.context = self
 		return self
 	
 	def __exit__(self, exc_type, exc_value, traceback):
-		ident = threading.get_ident()
-		parent = self.parent
-		if parent:
-			_activeContextsByThread[ident] = parent
-		else:
-			del _activeContextsByThread[ident]
+		global _activeContextsCount
+		_local.context = self.parent
+		with _activeContextsCountLock:
+			_activeContextsCount -= 1
 	
 	def mute(self, func, *args, **kwargs):
 		if self.retains:
@@ -152,26 +153,60 @@ class _SpeechContextManager:
 				func(*args, **kwargs)
 
 
+def _checkIncrement(increment):
+	if not isinstance(increment, int):
+		raise ValueError("increment={!r}".format(increment))
+
+
 def speechMuted(increment=-1, retains=False, propagates=True):
+	_checkIncrement(increment)
 	return _SpeechContextManager(increment=increment, retains=retains, propagates=propagates)
 
 
 def speechUnmuted(increment=1, retains=False):
+	_checkIncrement(increment)
 	return _SpeechContextManager(increment=increment, retains=retains, propagates=False)
 
 
+class _MutedCall:
+	"""Call the given function within a speech context of the given increment.
+	
+	Lighter than `_decorator` for functions queued while a context is active:
+	The metadata, such as `__name__` which `queueHandler.flushQueue` reports
+	upon error, is looked up on the function only when needed.
+	"""
+	
+	__slots__ = ("func", "increment")
+	
+	def __init__(self, func, increment):
+		self.func = func
+		self.increment = increment
+	
+	def __call__(self, *args, **kwargs):
+		with _SpeechContextManager(self.increment):
+			return self.func(*args, **kwargs)
+	
+	def __getattr__(self, name):
+		if name == "func":
+			# Not initialized yet
+			raise AttributeError(name)
+		return getattr(self.func, name)
+
+
 def _decorator(func, increment):
 	
 	@wraps(func)
 	def wrapper(*args, **kwargs):
-		with speechMuted(increment=increment):
+		with _SpeechContextManager(increment):
 			return func(*args, **kwargs)
 	
 	return wrapper
 
 
 def speechMutedFunction(func, increment=-1):
+	_checkIncrement(increment)
 	return _decorator(func, increment=increment)
 
 def speechUnmutedFunction(func, increment=1):
+	_checkIncrement(increment)
 	return _decorator(func, increment=increment)
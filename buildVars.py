@@ -41,16 +41,11 @@ It can span multiple lines."""),
 # as the source for the user documentation in the base language.
 useRootDocAsUserDoc = True
 
-import os.path
+from pathlib import Path
 
 # Define the python files that are the sources of your add-on.
 # You can use glob expressions here, they will be expanded.
-pythonSources = [
-	os.path.join(dirpath, filename)
-	for dirpath, dirnames, filenames in os.walk("addon")
-		for filename in filenames
-		if os.path.splitext(filename)[1] == ".py"
-	]
+pythonSources = [str(path) for path in Path("addon").rglob("*.py")]
 
 # Native language.
 # This is the language of the root `readme.md` and the original string literals
@@ -59,7 +54,7 @@ pythonSources = [
 i18nNative = "en"
 
 # Files that contain strings for translation. Usually your python sources
-i18nSources = pythonSources + ["buildVars.py"]
+i18nSources = (*pythonSources, "buildVars.py")
 
 # Files that will be ignored when building the nvda-addon file
 # Paths are relative to the addon directory, not to the root directory of your addon sources.